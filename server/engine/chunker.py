@@ -284,3 +284,17 @@ def extract_signatures(chunks: List[CodeChunk]) -> str:
         prefix = f"[{c.kind.value}]"
         lines.append(f"{prefix:14s} L{c.start_line}-{c.end_line}  {c.signature}")
     return "\n".join(lines)
+
+
+def count_lines(text: str) -> int:
+    """
+    Count the lines in *text* without materialising them.
+
+    Matches ``len(text.splitlines())`` for ``\n`` / ``\r\n`` line endings
+    (a trailing newline does not start a new line), but runs as a single
+    C-level ``str.count`` instead of allocating one string per line.
+    """
+    if not text:
+        return 0
+    newlines = text.count("\n")
+    return newlines if text.endswith("\n") else newlines + 1
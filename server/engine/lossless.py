@@ -35,6 +35,9 @@ from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from typing import Dict, List, Tuple
 
+from utils.cache import LRUCache, content_hash
+from utils.decode import utf8_len
+
 # ── Codec constants ───────────────────────────────────────────────────────────
 
 _STX = "\x02"          # control char; never in source code
@@ -45,6 +48,12 @@ _MIN_PATTERN_LEN = 20   # characters – shorter strings save too little
 _MIN_OCCURRENCES = 2    # must appear at least twice to worth replacing
 _MAX_PATTERNS = 9999    # upper bound on decode-table entries
 
+# content hash → (body, decode_table).  Filename / language are metadata
+# only, so the same file uploaded under any name shares one entry.  The body
+# of non-repetitive input is about as large as the input, so the cache is
+# bounded by size as well as by entry count.
+_ENCODE_CACHE = LRUCache(maxsize=256, maxbytes=32 * 1024 * 1024)
+
 
 # ── Data model ────────────────────────────────────────────────────────────────
 
@@ -61,6 +70,19 @@ class LosslessFile:
     decode_table: Dict[str, str]  # {"0000": "original pattern", ...}
     body: str                     # encoded body with placeholders
 
+    def to_dict(self) -> dict:
+        return {
+            "filename": self.filename,
+            "language": self.language,
+            "original_size": self.original_size,
+            "encoded_size": self.encoded_size,
+            "patterns_count": self.patterns_count,
+            "compression_ratio": round(self.compression_ratio, 4),
+            "space_saved_pct": round(self.space_saved_pct, 2),
+            "decode_table": self.decode_table,
+            "body": self.body,
+        }
+
 
 @dataclass
 class LosslessBundle:
@@ -75,20 +97,7 @@ class LosslessBundle:
         return {
             "tokentrim_lossless_v1": self.tokentrim_lossless_v1,
             "generated": self.generated,
-            "files": [
-                {
-                    "filename": f.filename,
-                    "language": f.language,
-                    "original_size": f.original_size,
-                    "encoded_size": f.encoded_size,
-                    "patterns_count": f.patterns_count,
-                    "compression_ratio": round(f.compression_ratio, 4),
-                    "space_saved_pct": round(f.space_saved_pct, 2),
-                    "decode_table": f.decode_table,
-                    "body": f.body,
-                }
-                for f in self.files
-            ],
+            "files": [f.to_dict() for f in self.files],
         }
 
     def to_json(self, indent: int = 2) -> str:
@@ -162,9 +171,40 @@ def lossless_encode(
     """
     Encode *text* losslessly.  Returns a :class:`LosslessFile` whose
     *body* + *decode_table* are sufficient to reconstruct the original.
+
+    The substitution pass is memoised by content hash, so re-encoding an
+    identical file skips the pattern search.
     """
-    original_size = len(text.encode("utf-8"))
+    original_size = utf8_len(text)
+
+    key = content_hash(text)
+    cached = _ENCODE_CACHE.get(key)
+    if cached is None:
+        cached = _substitute_patterns(text)
+        _ENCODE_CACHE.put(
+            key, cached, nbytes=len(cached[0]) + sum(map(len, cached[1].values()))
+        )
+    body, decode_table = cached
+
+    encoded_size = utf8_len(body)
+    ratio = original_size / encoded_size if encoded_size > 0 else 1.0
+    saved_pct = max(0.0, (1 - encoded_size / original_size) * 100) if original_size else 0.0
+
+    return LosslessFile(
+        filename=filename,
+        language=language,
+        original_size=original_size,
+        encoded_size=encoded_size,
+        patterns_count=len(decode_table),
+        compression_ratio=ratio,
+        space_saved_pct=saved_pct,
+        decode_table=dict(decode_table),  # private copy; the cached one is shared
+        body=body,
+    )
+
 
+def _substitute_patterns(text: str) -> Tuple[str, Dict[str, str]]:
+    """Internal: escape STX and replace repeated patterns with placeholders."""
     # Step 0 – escape any raw STX/ETX bytes in the source
     body = text.replace(_STX, _ESCAPE)
 
@@ -191,21 +231,7 @@ def lossless_encode(
         decode_table[f"{n:04d}"] = pattern
         body = body.replace(pattern, placeholder)
 
-    encoded_size = len(body.encode("utf-8"))
-    ratio = original_size / encoded_size if encoded_size > 0 else 1.0
-    saved_pct = max(0.0, (1 - encoded_size / original_size) * 100) if original_size else 0.0
-
-    return LosslessFile(
-        filename=filename,
-        language=language,
-        original_size=original_size,
-        encoded_size=encoded_size,
-        patterns_count=len(decode_table),
-        compression_ratio=ratio,
-        space_saved_pct=saved_pct,
-        decode_table=decode_table,
-        body=body,
-    )
+    return body, decode_table
 
 
 # ── Decode ────────────────────────────────────────────────────────────────────
@@ -31,6 +31,7 @@ class MinifyResult:
     reduction_pct: float          # percentage of chars removed
     comments_removed: int         # approximate count of comment blocks stripped
     blank_lines_removed: int
+    aggressive: bool = False      # whether indentation/blank lines were collapsed
 
 
 # ── Language-specific comment patterns ────────────────────────────────────────
@@ -209,4 +210,5 @@ def minify_code(text: str, language: str = "unknown",
         reduction_pct=round(reduction, 2),
         comments_removed=comments_removed,
         blank_lines_removed=blanks_removed,
+        aggressive=aggressive,
     )
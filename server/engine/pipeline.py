@@ -12,24 +12,36 @@ The main compression orchestrator.  Chains together:
   7. Decode preamble generation
 
 And returns a single, unified ``CompressionReport``.
+
+Summarisation reuses the token count, minifier and chunker outputs
+instead of recomputing them.  Finished reports are memoised by content
+hash, so re-compressing identical input is an O(1) lookup.
 """
 
 from __future__ import annotations
 
 import json
+import sys
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from typing import AbstractSet, Any, Dict, List, Optional
 
 from engine import huffman_encode, huffman_decode, HuffmanResult
 from engine.minifier import minify_code, MinifyResult
-from engine.chunker import chunk_code, CodeChunk, ChunkKind, extract_signatures
-from engine.summariser import summarise, SummaryResult
+from engine.chunker import chunk_code, count_lines, CodeChunk, ChunkKind, extract_signatures
+from engine.summariser import summarise, SummaryResult, SUMMARY_LEVELS
+from utils.cache import LRUCache, content_hash
+from utils.decode import utf8_len
 from utils.tokens import estimate_tokens
 
 
+# (content hash, filename, language, aggressive, levels) → CompressionReport.
+# Bounded by size too: a report holds several copies of the file's text.
+_REPORT_CACHE = LRUCache(maxsize=64, maxbytes=32 * 1024 * 1024)
+
+
 # ── Report ────────────────────────────────────────────────────────────────────
 
-@dataclass
+@dataclass(slots=True)
 class ChunkReport:
     """Per-chunk breakdown."""
     kind: str
@@ -40,7 +52,7 @@ class ChunkReport:
     signature: Optional[str]
 
 
-@dataclass
+@dataclass(slots=True)
 class CompressionReport:
     """End-to-end result of the TokenTrim compression pipeline."""
 
@@ -88,6 +100,16 @@ class CompressionReport:
     decode_preamble: str
 
 
+def _report_size(report: CompressionReport) -> int:
+    """Approximate memory held by *report*: the length of its text fields."""
+    return (
+        len(report.minified_code) + len(report.skeleton)
+        + len(report.architecture) + len(report.compressed_code)
+        + len(report.decode_preamble)
+        + sum(map(len, report.hash_decode_map.values()))
+    )
+
+
 # ── Decode preamble generator ────────────────────────────────────────────────
 
 def _build_decode_preamble(hash_map: Dict[str, str], language: str) -> str:
@@ -127,7 +149,8 @@ def _build_decode_preamble(hash_map: Dict[str, str], language: str) -> str:
 
 def compress(text: str, filename: str = "unknown",
              language: str = "unknown",
-             aggressive_minify: bool = False) -> CompressionReport:
+             aggressive_minify: bool = False,
+             levels: AbstractSet[str] = SUMMARY_LEVELS) -> CompressionReport:
     """
     Run the full TokenTrim compression pipeline on a source file.
 
@@ -142,14 +165,25 @@ def compress(text: str, filename: str = "unknown",
         by the caller before invoking this.
     aggressive_minify:
         If True, collapse indentation and remove all blank lines.
+    levels:
+        Summary levels to generate (see ``SUMMARY_LEVELS``).  Callers that
+        only need the best-level output can pass ``{"compressed"}`` to skip
+        the skeleton and architecture passes.
 
     Returns
     -------
     CompressionReport
-        Full breakdown of all compression stages.
+        Full breakdown of all compression stages.  Reports are cached and
+        shared between callers, so treat the result as read-only.
     """
+    levels = frozenset(levels)
+    cache_key = (content_hash(text), filename, language, aggressive_minify, levels)
+    cached = _REPORT_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
     original_tokens = estimate_tokens(text)
-    original_lines = len(text.splitlines())
+    original_lines = count_lines(text)
 
     # ── Step 1: Minify ────────────────────────────────────────────────────────
     minified: MinifyResult = minify_code(
@@ -158,15 +192,17 @@ def compress(text: str, filename: str = "unknown",
     minified_tokens = estimate_tokens(minified.minified)
 
     # ── Step 2: Chunk ─────────────────────────────────────────────────────────
+    # Names / signatures repeat heavily ("<top-level>", keyword-only
+    # signatures) — intern them so every report shares one copy.
     chunks: List[CodeChunk] = chunk_code(text, language)
     chunk_reports = [
         ChunkReport(
             kind=c.kind.value,
-            name=c.name,
+            name=sys.intern(c.name),
             start_line=c.start_line,
             end_line=c.end_line,
             original_tokens=c.token_estimate,
-            signature=c.signature,
+            signature=sys.intern(c.signature) if c.signature is not None else None,
         )
         for c in chunks
     ]
@@ -175,7 +211,16 @@ def compress(text: str, filename: str = "unknown",
     huffman: HuffmanResult = huffman_encode(minified.minified)
 
     # ── Step 4: Summarise (skeleton / architecture / compressed) ──────────────
-    summary: SummaryResult = summarise(text, language, filename)
+    # The compressed level only reuses the minifier output when it was
+    # produced in aggressive mode (``MinifyResult.aggressive``).
+    summary: SummaryResult = summarise(
+        text, language, filename,
+        chunks=chunks,
+        minified=minified,
+        original_tokens=original_tokens,
+        minified_tokens=minified_tokens,
+        levels=levels,
+    )
 
     # ── Step 5: Build decode preamble ─────────────────────────────────────────
     preamble = _build_decode_preamble(summary.hash_decode_map, language)
@@ -184,7 +229,7 @@ def compress(text: str, filename: str = "unknown",
     # Only compare against minified/compressed output — skeleton and architecture
     # are structural summaries, not actual compression, so they must not be used
     # to claim a compression ratio.
-    if minified_tokens <= summary.compressed_tokens:
+    if "compressed" not in levels or minified_tokens <= summary.compressed_tokens:
         best_tokens = minified_tokens
         best_level = "minified"
     else:
@@ -192,10 +237,10 @@ def compress(text: str, filename: str = "unknown",
         best_level = "compressed"
     overall_reduction = (1 - best_tokens / original_tokens) * 100 if original_tokens else 0
 
-    return CompressionReport(
+    report = CompressionReport(
         filename=filename,
         language=language,
-        file_size=len(text.encode("utf-8")),
+        file_size=utf8_len(text),
         original_lines=original_lines,
 
         original_tokens=original_tokens,
@@ -228,16 +273,46 @@ def compress(text: str, filename: str = "unknown",
 
         decode_preamble=preamble,
     )
+    _REPORT_CACHE.put(cache_key, report, nbytes=_report_size(report))
+    return report
 
 
 def compress_to_dict(text: str, filename: str = "unknown",
                      language: str = "unknown",
-                     aggressive_minify: bool = False) -> Dict[str, Any]:
+                     aggressive_minify: bool = False,
+                     levels: AbstractSet[str] = SUMMARY_LEVELS) -> Dict[str, Any]:
     """
     Convenience wrapper that returns the compression report as a plain dict
     (suitable for JSON serialisation / FastAPI response).
+
+    ``summaryLevels`` always contains ``minified`` plus only the requested
+    *levels*.
     """
-    report = compress(text, filename, language, aggressive_minify)
+    levels = frozenset(levels)
+    report = compress(text, filename, language, aggressive_minify, levels)
+
+    summary_levels: Dict[str, Any] = {
+        "minified": {
+            "content": report.minified_code,
+            "tokens": report.minified_tokens,
+        },
+    }
+    if "skeleton" in levels:
+        summary_levels["skeleton"] = {
+            "content": report.skeleton,
+            "tokens": report.skeleton_tokens,
+        }
+    if "architecture" in levels:
+        summary_levels["architecture"] = {
+            "content": report.architecture,
+            "tokens": report.architecture_tokens,
+        }
+    if "compressed" in levels:
+        summary_levels["compressed"] = {
+            "content": report.compressed_code,
+            "tokens": report.compressed_tokens,
+        }
+
     return {
         "filename": report.filename,
         "language": report.language,
@@ -273,24 +348,7 @@ def compress_to_dict(text: str, filename: str = "unknown",
         ],
         "totalChunks": report.total_chunks,
 
-        "summaryLevels": {
-            "minified": {
-                "content": report.minified_code,
-                "tokens": report.minified_tokens,
-            },
-            "skeleton": {
-                "content": report.skeleton,
-                "tokens": report.skeleton_tokens,
-            },
-            "architecture": {
-                "content": report.architecture,
-                "tokens": report.architecture_tokens,
-            },
-            "compressed": {
-                "content": report.compressed_code,
-                "tokens": report.compressed_tokens,
-            },
-        },
+        "summaryLevels": summary_levels,
 
         "hashTable": {
             "decodeMap": report.hash_decode_map,
@@ -10,24 +10,31 @@ Three summary levels:
 
 Each level trades detail for token savings; the LLM can request drill-down
 into specific chunks when it needs full implementation details.
+
+Results of ``summarise`` are memoised by content hash (see ``utils.cache``).
 """
 
 from __future__ import annotations
 
+import functools
 import hashlib
+import io
 import re
-from collections import Counter
+import sys
+from bisect import bisect_left, bisect_right
+from collections import Counter, defaultdict
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Tuple
+from typing import AbstractSet, Dict, FrozenSet, List, Optional, Tuple
 
-from engine.chunker import CodeChunk, ChunkKind, chunk_code, extract_signatures
-from engine.minifier import minify_code
+from engine.chunker import CodeChunk, ChunkKind, chunk_code, count_lines, extract_signatures
+from engine.minifier import minify_code, MinifyResult
+from utils.cache import LRUCache, content_hash
 from utils.tokens import estimate_tokens
 
 
 # ── Hash table for repeated patterns ─────────────────────────────────────────
 
-@dataclass
+@dataclass(slots=True)
 class HashEntry:
     """A mapping from a short key to a repeated code pattern."""
     key: str
@@ -35,14 +42,19 @@ class HashEntry:
     occurrences: int
 
 
-@dataclass
+@dataclass(slots=True)
 class HashTable:
     """Collection of hash entries with decode instructions."""
     entries: Dict[str, HashEntry] = field(default_factory=dict)
 
-    def add(self, pattern: str) -> str:
-        """Register a pattern (if new) and return its short hash key."""
-        h = _short_hash(pattern)
+    def add(self, pattern: str, key: Optional[str] = None) -> str:
+        """
+        Register a pattern (if new) and return its short hash key.
+
+        *key* may be supplied when it was already derived for *pattern*
+        (see ``_hash_keys``), skipping the per-call hash.
+        """
+        h = key or _short_hash(pattern)
         if h not in self.entries:
             self.entries[h] = HashEntry(key=h, pattern=pattern, occurrences=1)
         else:
@@ -59,11 +71,57 @@ class HashTable:
 
 
 def _short_hash(text: str, length: int = 6) -> str:
-    """Produce a short, deterministic hash key for a code fragment."""
-    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    """
+    Produce a short, deterministic hash key for a code fragment.
+
+    Keys only need to be unique within one file, not collision-resistant,
+    so BLAKE2b is asked for just enough digest bytes to fill *length* hex
+    characters instead of computing and truncating a full SHA-256.
+    """
+    digest = hashlib.blake2b(
+        text.encode("utf-8"), digest_size=(length + 1) // 2
+    ).hexdigest()
     return f"#{digest[:length]}"
 
 
+def _hash_keys(patterns: list[str]) -> Dict[str, str]:
+    """Derive the hash key for every pattern in one batch (pattern → key)."""
+    return {p: _short_hash(p) for p in patterns}
+
+
+# Shape of the keys ``_short_hash`` emits: ``#`` + 6 hex.
+_HASH_KEY_RE = re.compile(r"#[0-9a-f]{6}")
+
+
+@functools.lru_cache(maxsize=128)
+def _decode_key_regex(keys: Tuple[str, ...]) -> "re.Pattern[str]":
+    """
+    Compiled alternation matching any of *keys*.
+
+    *keys* must be ordered longest first, so a key that prefixes another
+    can't shadow it.  Memoised: clients usually decode the same file's map
+    repeatedly, and compiling a large alternation costs more than the scan.
+    """
+    return re.compile("|".join(map(re.escape, keys)))
+
+
+def expand_hash_references(code: str, decode_map: Dict[str, str]) -> str:
+    """
+    Expand the hash references in *code* back to their patterns.
+
+    One pass over the code instead of one full ``str.replace`` per key.
+    Maps made only of ``_short_hash`` keys are scanned with the fixed
+    key-shape pattern and a dict lookup, so the cost doesn't grow with the
+    number of keys; anything else falls back to an alternation of every key.
+    """
+    if decode_map and all(map(_HASH_KEY_RE.fullmatch, decode_map)):
+        return _HASH_KEY_RE.sub(lambda m: decode_map.get(m[0], m[0]), code)
+    keys = tuple(sorted((k for k in decode_map if k), key=lambda k: (-len(k), k)))
+    if not keys:
+        return code
+    return _decode_key_regex(keys).sub(lambda m: decode_map[m[0]], code)
+
+
 # ── Pattern detection ─────────────────────────────────────────────────────────
 
 # Common boilerplate patterns worth hashing
@@ -79,38 +137,165 @@ _BOILERPLATE_PATTERNS: list[re.Pattern] = [
 ]
 
 
+# All boilerplate patterns folded into one alternation so the text is
+# traversed once rather than once per pattern.
+_UNIFIED_BOILERPLATE = re.compile(
+    "|".join(f"(?:{p.pattern})" for p in _BOILERPLATE_PATTERNS), re.M
+)
+
+# A reference is a 7-char key (``#xxxxxx``), and every entry also costs a
+# decode-table row: the pattern itself plus the key and its separators
+# (``  #xxxxxx  →  …\n``).
+_KEY_LEN = 7
+_TABLE_ROW_OVERHEAD = _KEY_LEN + 8
+
+# Cheap pre-filter for intra-line boilerplate; ``_worth_hashing`` makes the
+# real call (a 16-char match needs 4 hits to pay for its row).
+_MIN_BOILERPLATE_LEN = 16
+
+# Multi-line repeats are looked for in sliding windows of 2..N lines
+# (same windowing as the lossless codec's pattern finder).
+_MAX_BLOCK_LINES = 3
+
+
+def _worth_hashing(pattern: str, hits: int) -> bool:
+    """
+    True if replacing *hits* occurrences of *pattern* with its key saves
+    more characters than the pattern's decode-table row costs.
+    """
+    return hits * (len(pattern) - _KEY_LEN) > len(pattern) + _TABLE_ROW_OVERHEAD
+
+
 def _find_repeated_patterns(text: str, min_len: int = 30, min_count: int = 2) -> list[str]:
     """
     Find substrings that appear multiple times and are worth hashing.
 
     Strategy: extract lines/blocks longer than *min_len* chars, count duplicates.
+    Blocks of up to ``_MAX_BLOCK_LINES`` consecutive lines are counted too,
+    so repeated multi-line boilerplate collapses into a single reference.
+    Known boilerplate (imports, decorators, method signatures) is matched
+    inside lines as well and counted separately, so a line is never counted
+    twice just for also being boilerplate.  Lines are split exactly as
+    ``_apply_hash_references`` splits them, so every candidate is one it can
+    find again.
     """
-    # Split into meaningful lines
-    lines = [ln.strip() for ln in text.splitlines() if len(ln.strip()) >= min_len]
-    counts = Counter(lines)
-    return [line for line, cnt in counts.items() if cnt >= min_count]
+    lines = text.split("\n")
+
+    # Split into meaningful lines — each line is stripped exactly once and the
+    # strip/filter/count chain stays in C-level iterators.  Keys are interned
+    # so duplicate lines share one string in the counter.
+    counts = Counter(
+        sys.intern(ln) for ln in map(str.strip, lines) if len(ln) >= min_len
+    )
+    boilerplate = Counter(
+        m for m in _UNIFIED_BOILERPLATE.findall(text)
+        if len(m) >= _MIN_BOILERPLATE_LEN and "\n" not in m
+    )
+    blocks: Counter[str] = Counter()
+    for window in range(2, _MAX_BLOCK_LINES + 1):
+        for i in range(len(lines) - window + 1):
+            block = "\n".join(lines[i:i + window]).strip()
+            if len(block) >= min_len and "\n" in block:
+                blocks[block] += 1
+
+    repeated = {line: None for line, cnt in counts.items() if cnt >= min_count}
+    for match, cnt in boilerplate.items():
+        if cnt >= min_count:
+            repeated.setdefault(match, None)
+    for block, cnt in blocks.items():
+        # Windows overlap, so *cnt* can include self-overlapping repeats;
+        # ``_apply_hash_references`` drops anything that ends up replaced
+        # fewer than *min_count* times.
+        if cnt >= min_count:
+            repeated.setdefault(block, None)
+    return list(repeated)
 
 
 def _apply_hash_references(text: str, hash_table: HashTable,
-                           patterns: list[str]) -> str:
+                           patterns: list[str], min_count: int = 2) -> str:
     """
     Replace repeated patterns with short hash references and record decode map.
 
     This reduces token footprint in the compressed representation while
     preserving full recoverability through ``hash_table``.
+
+    Every candidate from ``_find_repeated_patterns`` is a stripped block of
+    lines, a stripped line or a boilerplate match inside a line, so the text
+    is walked line by line and each candidate is found with a set lookup:
+    blocks first (longest window first), then the whole line, then the
+    boilerplate regex within it.  The cost is linear in the text and
+    independent of the number of patterns.
+
+    Overlapping candidates compete for the same text, so a pattern is only
+    given a hash entry if it was actually matched at least *min_count*
+    times and those matches save more than its decode-table row costs
+    (``_worth_hashing``); the rest are written back verbatim.
     """
-    result = text
-    for pattern in sorted(patterns, key=len, reverse=True):
-        if result.count(pattern) < 2:
-            continue
-        key = hash_table.add(pattern)
-        result = result.replace(pattern, key)
-    return result
+    candidates = set(patterns)
+    windows = [w for w in range(_MAX_BLOCK_LINES, 1, -1)
+               if any(p.count("\n") == w - 1 for p in candidates)]
+    boilerplate = any(_UNIFIED_BOILERPLATE.fullmatch(p) for p in candidates)
+
+    # Literal text with matched patterns at the indices in *slots*; matches
+    # are resolved to keys (or left as-is) once all hits have been counted.
+    parts: list[str] = []
+    slots: list[int] = []
+    hits: Counter[str] = Counter()
+
+    def _emit(span: str, core: str) -> None:
+        # *span* is *core* plus the surrounding whitespace that was stripped.
+        lead = len(span) - len(span.lstrip())
+        parts.append(span[:lead])
+        slots.append(len(parts))
+        parts.append(core)
+        parts.append(span[lead + len(core):])
+        hits[core] += 1
+
+    lines = text.split("\n")
+    n = len(lines)
+    i = 0
+    while i < n:
+        for w in windows:
+            if i + w <= n:
+                span = "\n".join(lines[i:i + w])
+                core = span.strip()
+                if core in candidates and "\n" in core:
+                    _emit(span, core)
+                    i += w
+                    break
+        else:
+            line = lines[i]
+            core = line.strip()
+            if core in candidates:
+                _emit(line, core)
+            elif boilerplate:
+                pos = 0
+                for m in _UNIFIED_BOILERPLATE.finditer(line):
+                    if m.group(0) in candidates:
+                        parts.append(line[pos:m.start()])
+                        slots.append(len(parts))
+                        parts.append(m.group(0))
+                        hits[m.group(0)] += 1
+                        pos = m.end()
+                parts.append(line[pos:])
+            else:
+                parts.append(line)
+            i += 1
+        parts.append("\n")
+    parts.pop()  # no newline after the last line
+
+    keys = _hash_keys([p for p, n in hits.items()
+                       if n >= min_count and _worth_hashing(p, n)])
+    for i in slots:
+        key = keys.get(parts[i])
+        if key is not None:
+            parts[i] = hash_table.add(parts[i], key)
+    return "".join(parts)
 
 
 # ── Summary result ────────────────────────────────────────────────────────────
 
-@dataclass
+@dataclass(slots=True)
 class SummaryResult:
     """Overall summary output with multiple detail levels."""
     # Skeleton: just signatures
@@ -133,7 +318,15 @@ class SummaryResult:
     original_tokens: int
     best_tokens: int
     best_reduction_pct: float
-    recommended_level: str        # "skeleton" | "architecture" | "compressed"
+    recommended_level: str        # "compressed" | "original" (compressed level skipped)
+
+
+# Names accepted by ``summarise(levels=...)``.
+SUMMARY_LEVELS: FrozenSet[str] = frozenset({"skeleton", "architecture", "compressed"})
+
+# (content hash, language, filename, levels) → SummaryResult, size-bounded
+# like the pipeline report cache.
+_SUMMARY_CACHE = LRUCache(maxsize=64, maxbytes=16 * 1024 * 1024)
 
 
 # ── Public API ────────────────────────────────────────────────────────────────
@@ -145,52 +338,62 @@ def generate_skeleton(chunks: List[CodeChunk]) -> str:
     Shows the file's structure without any implementation bodies.
     Useful for orienting the LLM about what's in the file.
     """
-    out: list[str] = []
-    out.append("// ═══ FILE SKELETON ═══")
-    out.append("")
+    # Bucket chunks by kind in a single pass instead of re-filtering the
+    # whole list once per section.
+    by_kind: Dict[ChunkKind, List[CodeChunk]] = defaultdict(list)
+    for c in chunks:
+        by_kind[c.kind].append(c)
+
+    # Methods sorted by start line, so each class finds its own methods with
+    # a bisect over the class's line range instead of scanning every chunk.
+    methods = sorted(by_kind[ChunkKind.METHOD], key=lambda m: m.start_line)
+    method_starts = [m.start_line for m in methods]
+
+    # Every line after the header is written with a leading newline, which
+    # reproduces "\n".join() without keeping a list of small strings around.
+    buf = io.StringIO()
+    write = buf.write
+    write("// ═══ FILE SKELETON ═══")
+    write("\n")
 
     # Group imports
-    imports = [c for c in chunks if c.kind == ChunkKind.IMPORT]
+    imports = by_kind[ChunkKind.IMPORT]
     if imports:
-        out.append("// Imports:")
+        write("\n// Imports:")
         for c in imports:
-            out.append(f"  {c.signature}")
-        out.append("")
+            write(f"\n  {c.signature}")
+        write("\n")
 
     # Classes, interfaces, types
     for kind in (ChunkKind.CLASS, ChunkKind.INTERFACE, ChunkKind.TYPE_ALIAS):
-        items = [c for c in chunks if c.kind == kind]
-        for c in items:
-            out.append(f"  {c.signature}  // L{c.start_line}-{c.end_line} ({c.token_estimate} tokens)")
+        for c in by_kind[kind]:
+            write(f"\n  {c.signature}  // L{c.start_line}-{c.end_line} ({c.token_estimate} tokens)")
 
             # List methods inside class range
-            methods = [
-                m for m in chunks
-                if m.kind == ChunkKind.METHOD
-                and m.start_line >= c.start_line
-                and m.end_line <= c.end_line
-            ]
-            for m in methods:
-                out.append(f"    {m.signature}")
-            out.append("")
+            lo = bisect_left(method_starts, c.start_line)
+            hi = bisect_right(method_starts, c.end_line)
+            for m in methods[lo:hi]:
+                if m.end_line <= c.end_line:
+                    write(f"\n    {m.signature}")
+            write("\n")
 
     # Standalone functions
-    functions = [c for c in chunks if c.kind == ChunkKind.FUNCTION]
+    functions = by_kind[ChunkKind.FUNCTION]
     if functions:
-        out.append("// Functions:")
+        write("\n// Functions:")
         for c in functions:
-            out.append(f"  {c.signature}  // L{c.start_line}-{c.end_line} ({c.token_estimate} tokens)")
-        out.append("")
+            write(f"\n  {c.signature}  // L{c.start_line}-{c.end_line} ({c.token_estimate} tokens)")
+        write("\n")
 
     # Constants
-    constants = [c for c in chunks if c.kind == ChunkKind.CONSTANT]
+    constants = by_kind[ChunkKind.CONSTANT]
     if constants:
-        out.append("// Constants:")
+        write("\n// Constants:")
         for c in constants:
-            out.append(f"  {c.signature}")
-        out.append("")
+            write(f"\n  {c.signature}")
+        write("\n")
 
-    return "\n".join(out)
+    return buf.getvalue()
 
 
 def generate_architecture(text: str, chunks: List[CodeChunk],
@@ -201,54 +404,66 @@ def generate_architecture(text: str, chunks: List[CodeChunk],
     Shows file metadata, dependency graph, component relationships,
     and a structural overview — all in a compact format.
     """
-    out: list[str] = []
-    out.append("// ═══ ARCHITECTURE SUMMARY ═══")
-    out.append(f"// File: {filename}")
-    out.append(f"// Total lines: {len(text.splitlines())}")
-    out.append(f"// Chunks: {len(chunks)}")
-    out.append("")
+    buf = io.StringIO()
+    write = buf.write
+    write("// ═══ ARCHITECTURE SUMMARY ═══")
+    write(f"\n// File: {filename}")
+    write(f"\n// Total lines: {count_lines(text)}")
+    write(f"\n// Chunks: {len(chunks)}")
+    write("\n")
 
     # Dependency section
     imports = [c for c in chunks if c.kind == ChunkKind.IMPORT]
     if imports:
-        out.append("// Dependencies:")
+        write("\n// Dependencies:")
         for c in imports:
-            out.append(f"  {c.content.strip()}")
-        out.append("")
+            write(f"\n  {c.content.strip()}")
+        write("\n")
 
     # Component map
-    out.append("// Component Map:")
+    write("\n// Component Map:")
     for c in chunks:
         if c.kind in (ChunkKind.IMPORT, ChunkKind.BLOCK):
             continue
         indent = "  " if c.kind != ChunkKind.METHOD else "    "
         tokens_label = f"~{c.token_estimate} tokens"
-        out.append(f"{indent}[{c.kind.value:10s}] {c.name:30s} L{c.start_line:>4d}-{c.end_line:<4d} {tokens_label}")
-    out.append("")
+        write(f"\n{indent}[{c.kind.value:10s}] {c.name:30s} L{c.start_line:>4d}-{c.end_line:<4d} {tokens_label}")
+    write("\n")
 
-    # Cross-references (simple: which chunks reference which names)
+    # Cross-references (simple: which chunks reference which names).
+    # One alternation over every name scans each body once, instead of one
+    # substring search per (chunk, name) pair.
     all_names = {c.name for c in chunks if c.name != "<top-level>"}
-    out.append("// Cross-references:")
-    for c in chunks:
-        if c.kind in (ChunkKind.IMPORT, ChunkKind.BLOCK):
-            continue
-        refs = [n for n in all_names if n != c.name and n in c.content]
-        if refs:
-            out.append(f"  {c.name} → {', '.join(refs)}")
-    out.append("")
-
-    return "\n".join(out)
+    write("\n// Cross-references:")
+    if all_names:
+        name_re = re.compile(r"(?<!\w)(?:" + "|".join(
+            re.escape(n) for n in sorted(all_names, key=len, reverse=True)
+        ) + r")(?!\w)")
+        for c in chunks:
+            if c.kind in (ChunkKind.IMPORT, ChunkKind.BLOCK):
+                continue
+            refs = sorted(set(name_re.findall(c.content)) - {c.name})
+            if refs:
+                write(f"\n  {c.name} → {', '.join(refs)}")
+    write("\n")
+
+    return buf.getvalue()
 
 
 def generate_compressed(text: str, language: str,
-                        aggressive: bool = True) -> Tuple[str, HashTable]:
+                        aggressive: bool = True,
+                        minified: Optional[MinifyResult] = None) -> Tuple[str, HashTable]:
     """
     Level 3: Minified code with hash references for repeated patterns.
 
     Returns the compressed code string and the hash table for decoding.
+    Pass *minified* to reuse an existing minification of *text* instead of
+    running the minifier again; it is only reused when it was produced with
+    the same *aggressive* setting.
     """
     # Step 1: Minify
-    minified = minify_code(text, language=language, aggressive=aggressive)
+    if minified is None or minified.aggressive != aggressive:
+        minified = minify_code(text, language=language, aggressive=aggressive)
 
     # Step 2: Find repeated patterns
     repeated = _find_repeated_patterns(minified.minified)
@@ -263,10 +478,15 @@ def generate_compressed(text: str, language: str,
 
 
 def summarise(text: str, language: str = "unknown",
-              filename: str = "unknown") -> SummaryResult:
+              filename: str = "unknown",
+              chunks: Optional[List[CodeChunk]] = None,
+              minified: Optional[MinifyResult] = None,
+              original_tokens: Optional[int] = None,
+              minified_tokens: Optional[int] = None,
+              levels: AbstractSet[str] = SUMMARY_LEVELS) -> SummaryResult:
     """
-    Run all three summary levels and return a combined result with
-    recommendations on which level to use.
+    Run the requested summary levels (all three by default) and return a
+    combined result with recommendations on which level to use.
 
     Parameters
     ----------
@@ -276,45 +496,93 @@ def summarise(text: str, language: str = "unknown",
         Language name (e.g. "Python", "TypeScript (React)").
     filename:
         Original filename, used in architectural summary.
+    chunks, minified, original_tokens:
+        Optional pre-computed ``chunk_code(text)``, ``minify_code(text)`` and
+        ``estimate_tokens(text)`` results.  Any that are omitted are computed
+        here; a non-aggressive *minified* is ignored by the compressed level.
+    minified_tokens:
+        Optional ``estimate_tokens(minified.minified)``.  When no hash
+        references end up being applied the compressed level *is* the
+        minified code, so its token count is reused instead of re-tokenising.
+    levels:
+        Subset of ``SUMMARY_LEVELS`` to generate.  Skipped levels come back
+        as empty strings with 0 tokens (and an empty hash table when
+        ``"compressed"`` is skipped).
 
     Returns
     -------
     SummaryResult
+        Cached by content hash; treat as read-only.
     """
-    # Chunk the code
-    chunks = chunk_code(text, language)
-    original_tokens = estimate_tokens(text)
+    levels = frozenset(levels)
+    unknown = levels - SUMMARY_LEVELS
+    if unknown:
+        raise ValueError(f"Unknown summary level(s): {', '.join(sorted(unknown))}")
+
+    cache_key = (content_hash(text), language, filename, levels)
+    cached = _SUMMARY_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
+    # Chunk the code (only the structural levels need it)
+    if chunks is None and levels & {"skeleton", "architecture"}:
+        chunks = chunk_code(text, language)
+    if original_tokens is None:
+        original_tokens = estimate_tokens(text)
 
     # Level 1: Skeleton
-    skeleton = generate_skeleton(chunks)
-    skeleton_tokens = estimate_tokens(skeleton)
+    skeleton, skeleton_tokens = "", 0
+    if "skeleton" in levels:
+        skeleton = generate_skeleton(chunks)
+        skeleton_tokens = estimate_tokens(skeleton)
 
     # Level 2: Architecture
-    architecture = generate_architecture(text, chunks, filename)
-    arch_tokens = estimate_tokens(architecture)
+    architecture, arch_tokens = "", 0
+    if "architecture" in levels:
+        architecture = generate_architecture(text, chunks, filename)
+        arch_tokens = estimate_tokens(architecture)
 
     # Level 3: Compressed
-    compressed, hash_table = generate_compressed(text, language, aggressive=True)
-    compressed_tokens = estimate_tokens(compressed)
+    compressed, compressed_tokens = "", 0
+    hash_decode_map: Dict[str, str] = {}
+    if "compressed" in levels:
+        compressed, hash_table = generate_compressed(
+            text, language, aggressive=True, minified=minified
+        )
+        hash_decode_map = hash_table.decode_map()
+        reused = minified is not None and minified.aggressive
+        if reused and minified_tokens is not None and not hash_decode_map:
+            compressed_tokens = minified_tokens
+        else:
+            compressed_tokens = estimate_tokens(compressed)
 
     # Pick best level — only between minified/compressed representations.
     # Skeleton and architecture are structural views, not real compression;
     # using them would produce misleadingly high reduction percentages.
-    best_level = "compressed"
-    best_tokens = compressed_tokens
+    if "compressed" in levels:
+        best_level = "compressed"
+        best_tokens = compressed_tokens
+    else:
+        best_level = "original"
+        best_tokens = original_tokens
     reduction = (1 - best_tokens / original_tokens) * 100 if original_tokens else 0
 
-    return SummaryResult(
+    result = SummaryResult(
         skeleton=skeleton,
         skeleton_tokens=skeleton_tokens,
         architecture=architecture,
         architecture_tokens=arch_tokens,
         compressed_code=compressed,
         compressed_tokens=compressed_tokens,
-        hash_decode_map=hash_table.decode_map(),
-        hash_entries_count=hash_table.size,
+        hash_decode_map=hash_decode_map,
+        hash_entries_count=len(hash_decode_map),
         original_tokens=original_tokens,
         best_tokens=best_tokens,
         best_reduction_pct=round(reduction, 2),
         recommended_level=best_level,
     )
+    _SUMMARY_CACHE.put(cache_key, result, nbytes=(
+        len(skeleton) + len(architecture) + len(compressed)
+        + sum(map(len, hash_decode_map.values()))
+    ))
+    return result
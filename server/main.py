@@ -1,22 +1,184 @@
+import asyncio
+import functools
+import re
+import time
+
+import orjson
+
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import PlainTextResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Any, Dict, List, Optional
-from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
 
-from utils.language import detect_language
-from utils.tokens import estimate_tokens
+from utils.language import detect_language, detect_language_from_mime
+from utils.tokens import estimate_tokens, estimate_tokens_bytes
+from utils.decode import utf8_len
 from utils.pdf_extractor import extract_pdf_text, is_pdf
 from engine.pipeline import compress_to_dict
+from engine.summariser import expand_hash_references
 from engine.lossless import (
     lossless_encode,
     lossless_decode_from_dict,
     LosslessBundle,
+    LosslessFile,
     verify_roundtrip,
 )
 
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10 MB
+MAX_BUNDLE_SIZE = MAX_FILE_SIZE * 10    # decoded bundles hold many files
+_READ_CHUNK = 64 * 1024           # upload read granularity
+
+
+# ── Formatting helpers ────────────────────────────────────────────────────────
+
+# (unix second, formatted) — bundle headers only have 1-second resolution,
+# so every request within the same second reuses one formatted string.
+_ISO_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+_now_cache: Tuple[int, str] = (0, "")
+
+
+def _iso_now() -> str:
+    """Current UTC time as ``YYYY-MM-DDTHH:MM:SSZ``, cached per second."""
+    global _now_cache
+    second = int(time.time())
+    if second != _now_cache[0]:
+        _now_cache = (second, time.strftime(_ISO_FORMAT, time.gmtime(second)))
+    return _now_cache[1]
+
+
+@functools.lru_cache(maxsize=4096)
+def _fmt(n: int) -> str:
+    """Thousands-separated token count (``12,345``), memoised — counts repeat."""
+    return f"{n:,}"
+
+
+# ── Upload helpers ────────────────────────────────────────────────────────────
+
+async def _read_capped(upload: UploadFile, cap: int = MAX_FILE_SIZE) -> bytearray:
+    """
+    Read at most ``cap + 1`` bytes of *upload* into one buffer.
+
+    Callers reject oversize files with ``len(result) > cap`` without the
+    rest of the upload ever being pulled into memory.  When the parser has
+    recorded the upload's size, the buffer is allocated once at that size
+    and filled with ``readinto`` (no intermediate ``bytes`` copies);
+    otherwise it grows in 64 KB chunks.  Only an upload spooled to disk is
+    read in a worker thread; one still held in memory is copied inline,
+    which is cheaper than the thread hop.
+    """
+    if upload.size is not None:
+        buf = bytearray(min(upload.size, cap + 1))
+        filled = 0
+        # Same check as Starlette's UploadFile: SpooledTemporaryFile._rolled.
+        on_disk = getattr(upload.file, "_rolled", True)
+        with memoryview(buf) as view:
+            while filled < len(buf):
+                if on_disk:
+                    got = await asyncio.to_thread(upload.file.readinto, view[filled:])
+                else:
+                    got = upload.file.readinto(view[filled:])
+                if not got:
+                    break
+                filled += got
+        del buf[filled:]
+        return buf
+
+    buf = bytearray()
+    while len(buf) <= cap:
+        chunk = await upload.read(min(_READ_CHUNK, cap + 1 - len(buf)))
+        if not chunk:
+            break
+        buf += chunk
+    return buf
+
+
+async def _ingest_upload(idx: int, upload: UploadFile) -> Tuple[str, str, str]:
+    """
+    Read and decode the *idx*-th (1-based) file of a multi-file pipeline.
+
+    Returns ``(filename, language, text)``; an oversize file raises a 413
+    naming it.  Files without a name are called ``file_<idx>``.
+    """
+    raw = await _read_capped(upload)
+    if len(raw) > MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"{upload.filename}: exceeds 10 MB limit.",
+        )
+    filename = upload.filename or f"file_{idx}"
+    return filename, detect_language(filename), raw.decode("utf-8", errors="replace")
+
+
+# ── Request size guard ────────────────────────────────────────────────────────
+
+# Multipart boundaries and part headers on top of the file bytes themselves.
+_MULTIPART_SLACK = 64 * 1024
+
+# Body-size ceilings per endpoint.  Single-upload endpoints are capped at
+# one file; the multi-file pipelines at a whole bundle, since their output
+# must still fit through the bundle decoders.  Each bundle file is also
+# capped on its own (see ``_ingest_upload``).
+_BUNDLE_REQUEST_LIMIT = MAX_BUNDLE_SIZE + _MULTIPART_SLACK
+_BODY_LIMITS: Dict[str, int] = {
+    "/analyze-file": MAX_FILE_SIZE + _MULTIPART_SLACK,
+    "/compress": MAX_FILE_SIZE + _MULTIPART_SLACK,
+    "/pipeline/raw": _BUNDLE_REQUEST_LIMIT,
+    "/pipeline/compressed": _BUNDLE_REQUEST_LIMIT,
+    "/pipeline/lossless": _BUNDLE_REQUEST_LIMIT,
+    "/pipeline/lossless/decode": _BUNDLE_REQUEST_LIMIT,
+    "/pipeline/no-extension": _BUNDLE_REQUEST_LIMIT,
+    "/pipeline/with-extension": _BUNDLE_REQUEST_LIMIT,
+    "/pipeline/with-extension/decode": _BUNDLE_REQUEST_LIMIT,
+}
+_BODY_TOO_LARGE = "Request body exceeds the upload size limit."
+
+
+class BodySizeLimitMiddleware:
+    """
+    Reject requests whose body is over the endpoint's limit with a 413.
+
+    A declared ``Content-Length`` is checked before the body is read,
+    instead of spooling the whole upload only to refuse it afterwards.
+    Bodies sent without one (chunked) are counted as they arrive and cut
+    off once they pass the limit.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        limit = _BODY_LIMITS.get(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        declared = next(
+            (value for name, value in scope["headers"] if name == b"content-length"),
+            None,
+        )
+        if declared is not None:
+            if declared.isdigit() and int(declared) > limit:
+                response = ORJSONResponse({"detail": _BODY_TOO_LARGE}, status_code=413)
+                await response(scope, receive, send)
+                return
+            await self.app(scope, receive, send)
+            return
+
+        received = 0
+
+        async def capped_receive() -> Dict[str, Any]:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise HTTPException(status_code=413, detail=_BODY_TOO_LARGE)
+            return message
+
+        await self.app(scope, capped_receive, send)
+
 
 # ── Pydantic response models ─────────────────────────────────────────────────
 
@@ -29,22 +191,38 @@ class FileAnalysisResponse(BaseModel):
 
 # ── App ───────────────────────────────────────────────────────────────────────
 
-app = FastAPI(title="TokenTrim API", version="1.0.0")
+# JSON endpoints serialise with orjson rather than the stdlib json module.
+app = FastAPI(
+    title="TokenTrim API",
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+)
+
+# Added first so it sits inside CORS — early 413s still carry CORS headers.
+app.add_middleware(BodySizeLimitMiddleware)
+
+_CORS_ORIGINS: Tuple[str, ...] = (
+    "http://localhost:5173",  # Vite default
+    "http://localhost:5174",  # Vite fallback
+    "http://localhost:3000",  # Alternative
+    "http://localhost:80",
+    "https://trimtoken.vercel.app",  # Production
+)
 
+# Matched as one compiled alternation (Starlette ``fullmatch``es it against
+# the Origin header) rather than a list scan on every request.
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=[
-        "http://localhost:5173",  # Vite default
-        "http://localhost:5174",  # Vite fallback
-        "http://localhost:3000",  # Alternative
-        "http://localhost:80",
-        "https://trimtoken.vercel.app",  # Production
-    ],
+    allow_origin_regex="|".join(map(re.escape, _CORS_ORIGINS)),
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
+# Bundles and compression reports are large, highly repetitive text —
+# gzip them for clients that accept it.  Small responses go out as-is.
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 
 @app.get("/")
 async def root():
@@ -53,10 +231,15 @@ async def root():
 
 # ── Existing analysis endpoint ────────────────────────────────────────────────
 
-@app.post("/analyze-file", response_model=FileAnalysisResponse)
-async def analyze_file(file: UploadFile = File(...)):
-    """Quick file analysis — language detection + token estimate."""
-    content = await file.read(MAX_FILE_SIZE + 1)
+@app.post("/analyze-file", responses={200: {"model": FileAnalysisResponse}})
+async def analyze_file(file: UploadFile = File(...)) -> ORJSONResponse:
+    """
+    Quick file analysis — language detection + token estimate.
+
+    ``FileAnalysisResponse`` only documents the schema; the response is
+    returned directly so it skips Pydantic validation and serialisation.
+    """
+    content = await _read_capped(file)
     if len(content) > MAX_FILE_SIZE:
         raise HTTPException(
             status_code=413,
@@ -67,29 +250,27 @@ async def analyze_file(file: UploadFile = File(...)):
     filename = file.filename or "unknown"
     file_size = len(content)
 
-    language = detect_language(filename)
+    language = detect_language_from_mime(file.content_type) or detect_language(filename)
 
     # ── PDF: extract text layer before any processing ──────────────────────
+    # Text extraction is pure-Python and CPU-bound, so it runs off the loop.
     if is_pdf(filename, content):
         try:
-            text = extract_pdf_text(content)
+            text = await asyncio.to_thread(extract_pdf_text, content)
             language = "PDF (Plain Text)"
         except ValueError as exc:
             raise HTTPException(status_code=422, detail=str(exc))
+        token_estimate = estimate_tokens(text)
     else:
-        try:
-            text = content.decode("utf-8", errors="replace")
-        except Exception:
-            text = content.decode("latin-1", errors="replace")
+        # Only the count is needed — skip decoding the upload to str.
+        token_estimate = estimate_tokens_bytes(content)
 
-    token_estimate = estimate_tokens(text)
-
-    return FileAnalysisResponse(
-        fileName=filename,
-        fileSize=file_size,
-        language=language,
-        tokenEstimate=token_estimate,
-    )
+    return ORJSONResponse({
+        "fileName": filename,
+        "fileSize": file_size,
+        "language": language,
+        "tokenEstimate": token_estimate,
+    })
 
 
 # ── COMPRESSION endpoint (full pipeline) ─────────────────────────────────────
@@ -98,18 +279,20 @@ async def analyze_file(file: UploadFile = File(...)):
 async def compress_file(
     file: UploadFile = File(...),
     aggressive: bool = False,
-) -> Dict[str, Any]:
+) -> ORJSONResponse:
     """
     Run the full TokenTrim compression pipeline on an uploaded file.
 
     Returns Huffman stats, minified code, semantic chunks, three summary
     levels (skeleton / architecture / compressed), hash decode map,
-    and a decode preamble for LLM use.
+    and a decode preamble for LLM use.  The report is serialised straight
+    to bytes with orjson — the multi-MB code strings never go through
+    FastAPI's encoder.
 
     Query params:
       - aggressive (bool): if true, collapse indentation and remove all blanks.
     """
-    content = await file.read(MAX_FILE_SIZE + 1)
+    content = await _read_capped(file)
     if len(content) > MAX_FILE_SIZE:
         raise HTTPException(
             status_code=413,
@@ -118,29 +301,28 @@ async def compress_file(
         )
 
     filename = file.filename or "unknown"
-    language = detect_language(filename)
+    language = detect_language_from_mime(file.content_type) or detect_language(filename)
 
     # ── PDF: extract text layer before compression ─────────────────────────
     if is_pdf(filename, content):
         try:
-            text = extract_pdf_text(content)
+            text = await asyncio.to_thread(extract_pdf_text, content)
             language = "PDF (Plain Text)"
         except ValueError as exc:
             raise HTTPException(status_code=422, detail=str(exc))
     else:
-        try:
-            text = content.decode("utf-8", errors="replace")
-        except Exception:
-            text = content.decode("latin-1", errors="replace")
+        text = content.decode("utf-8", errors="replace")
 
-    result = compress_to_dict(
+    # CPU-bound — run it off the event loop so other requests keep flowing.
+    result = await asyncio.to_thread(
+        compress_to_dict,
         text=text,
         filename=filename,
         language=language,
         aggressive_minify=aggressive,
     )
 
-    return result
+    return ORJSONResponse(result)
 
 
 # ── DECODE endpoint ───────────────────────────────────────────────────────────
@@ -148,7 +330,7 @@ async def compress_file(
 @app.post("/decode")
 async def decode_hash_references(
     body: Dict[str, Any],
-) -> Dict[str, str]:
+) -> ORJSONResponse:
     """
     Expand hash references in compressed code using a decode map.
 
@@ -164,90 +346,170 @@ async def decode_hash_references(
     if not code:
         raise HTTPException(status_code=400, detail="Missing 'code' field.")
 
-    expanded = code
-    for key, pattern in decode_map.items():
-        expanded = expanded.replace(key, pattern)
+    expanded = expand_hash_references(code, decode_map)
 
-    return {"decoded": expanded}
+    return ORJSONResponse({"decoded": expanded})
 
 
 # ── PIPELINE: raw merge ───────────────────────────────────────────────────────
 
 _SEP = "\n" + "═" * 60 + "\n"
+_SEP_BYTES = _SEP.encode("utf-8")
+_DASH40 = "-" * 40
+_DASH40_NL = _DASH40 + "\n"
+
+# Fixed banner boxes; only the stats lines below them vary per request.
+_RAW_BANNER_HEAD = (
+    "╔══════════════════════════════════════════════════════╗\n"
+    "║        TOKENTRIM  ·  RAW CONTEXT BUNDLE              ║\n"
+    "╚══════════════════════════════════════════════════════╝\n"
+)
+_COMPRESSED_BANNER_HEAD = (
+    "╔══════════════════════════════════════════════════════╗\n"
+    "║     TOKENTRIM  ·  COMPRESSED CONTEXT BUNDLE          ║\n"
+    "╚══════════════════════════════════════════════════════╝\n"
+)
+
+# Bundles only embed the best level (minified or compressed), so the
+# skeleton / architecture summaries are never generated for them.
+_BUNDLE_LEVELS = frozenset({"compressed"})
+
+
+def _stream_sections(sections: Iterable[str]) -> StreamingResponse:
+    """
+    Send bundle *sections* separated by ``_SEP`` as a plain-text stream.
+
+    *sections* may be a generator: each section is only formatted, encoded
+    and written when the response reaches it, so neither the merged
+    document nor the full list of sections is ever held in memory.
+    """
+    async def body():
+        first = True
+        for section in sections:
+            if not first:
+                yield _SEP_BYTES
+            first = False
+            yield section.encode("utf-8")
+
+    return StreamingResponse(body(), media_type="text/plain")
 
 
 @app.post("/pipeline/raw", response_class=PlainTextResponse)
 async def pipeline_raw(
     chat: str = Form(default=""),
     files: List[UploadFile] = File(default=[]),
-) -> str:
+) -> StreamingResponse:
     """
     Pipeline 1 — Raw (uncompressed) context bundle.
 
     Merges the chat transcript and the raw contents of every attached file
     into a single plain-text document ready to paste into any LLM.
     """
-    now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
-    total_tokens = 0
-
-    sections: List[str] = []
-    sections.append(
-        f"╔══════════════════════════════════════════════════════╗\n"
-        f"║        TOKENTRIM  ·  RAW CONTEXT BUNDLE              ║\n"
-        f"╚══════════════════════════════════════════════════════╝\n"
-        f"Generated : {now}\n"
-        f"Files     : {len(files)}\n"
-        f"Mode      : Uncompressed (original content)"
-    )
-
-    # ── Chat section ─────────────────────────────────────────────────────────
-    if chat.strip():
-        chat_tokens = estimate_tokens(chat)
-        total_tokens += chat_tokens
-        sections.append(
-            f"[ CHAT ]  ({chat_tokens:,} tokens)\n"
-            + "-" * 40 + "\n"
-            + chat.strip()
-        )
+    now = _iso_now()
+    chat_stripped = chat.strip()
+    chat_tokens = estimate_tokens(chat_stripped) if chat_stripped else 0
+    total_tokens = chat_tokens
 
-    # ── File sections ─────────────────────────────────────────────────────────
+    # ── Read every file up front, so an oversize upload is a clean 413 ───────
+    file_entries: List[Tuple[int, str, str, int, str]] = []
     for idx, upload in enumerate(files, start=1):
-        raw = await upload.read(MAX_FILE_SIZE + 1)
-        if len(raw) > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=413,
-                detail=f"{upload.filename}: exceeds 10 MB limit.",
-            )
-        try:
-            text = raw.decode("utf-8", errors="replace")
-        except Exception:
-            text = raw.decode("latin-1", errors="replace")
-
-        filename = upload.filename or f"file_{idx}"
-        language = detect_language(filename)
+        filename, language, text = await _ingest_upload(idx, upload)
         file_tokens = estimate_tokens(text)
         total_tokens += file_tokens
-
-        sections.append(
-            f"[ FILE {idx}: {filename} ]  language={language}  ({file_tokens:,} tokens)\n"
-            + "-" * 40 + "\n"
-            + text.rstrip()
+        file_entries.append((idx, filename, language, file_tokens, text))
+
+    def sections() -> Iterator[str]:
+        yield (
+            f"{_RAW_BANNER_HEAD}"
+            f"Generated : {now}\n"
+            f"Files     : {len(files)}\n"
+            f"Mode      : Uncompressed (original content)"
         )
 
-    # ── Footer ────────────────────────────────────────────────────────────────
-    sections.append(f"[ END OF BUNDLE ]  Total estimated tokens: {total_tokens:,}")
+        # ── Chat section ─────────────────────────────────────────────────────
+        if chat_stripped:
+            yield f"[ CHAT ]  ({_fmt(chat_tokens)} tokens)\n{_DASH40_NL}{chat_stripped}"
 
-    return _SEP.join(sections)
+        # ── File sections ────────────────────────────────────────────────────
+        for idx, filename, language, file_tokens, text in file_entries:
+            yield (
+                f"[ FILE {idx}: {filename} ]  language={language}  ({_fmt(file_tokens)} tokens)\n"
+                f"{_DASH40_NL}{text.rstrip()}"
+            )
+
+        # ── Footer ───────────────────────────────────────────────────────────
+        yield f"[ END OF BUNDLE ]  Total estimated tokens: {_fmt(total_tokens)}"
+
+    return _stream_sections(sections())
 
 
 # ── PIPELINE: compressed merge ────────────────────────────────────────────────
 
+def _pattern_display(pattern: str, width: int, newline: str) -> str:
+    """
+    One-line rendering of a decode-map pattern: truncated to *width* chars
+    with an ellipsis, each newline shown as *newline*.
+    """
+    if len(pattern) > width:
+        return f"{pattern[:width]}…".replace("\n", newline)
+    return pattern.replace("\n", newline)
+
+
+class _FileView(NamedTuple):
+    """The fields of one file's compression report that a bundle renders."""
+    idx: int
+    filename: str
+    language: str
+    best_level: str
+    content: str
+    orig_t: int
+    best_t: int
+    reduction: float
+    huffman_ratio: float
+    decode_map: Dict[str, str]
+
+
+async def _compress_upload(
+    idx: int, upload: UploadFile, aggressive: bool,
+) -> _FileView:
+    """
+    Read, decode and compress one bundle file.
+
+    The CPU-bound ``compress_to_dict`` call runs in a worker thread so the
+    event loop stays free while the other files are read and compressed.
+    The report is flattened into a ``_FileView`` once, here, so the bundle
+    loops use attribute access instead of nested dict lookups.
+    """
+    filename, language, text = await _ingest_upload(idx, upload)
+    report = await asyncio.to_thread(
+        compress_to_dict,
+        text=text,
+        filename=filename,
+        language=language,
+        aggressive_minify=aggressive,
+        levels=_BUNDLE_LEVELS,
+    )
+    best_level = report["bestLevel"]
+    return _FileView(
+        idx=idx,
+        filename=filename,
+        language=report["language"],
+        best_level=best_level,
+        content=report["summaryLevels"][best_level]["content"],
+        orig_t=report["originalTokens"],
+        best_t=report["bestTokens"],
+        reduction=report["overallReductionPct"],
+        huffman_ratio=report["huffman"]["compressionRatio"],
+        decode_map=report["hashTable"]["decodeMap"],
+    )
+
+
 @app.post("/pipeline/compressed", response_class=PlainTextResponse)
 async def pipeline_compressed(
     chat: str = Form(default=""),
     files: List[UploadFile] = File(default=[]),
     aggressive: bool = False,
-) -> str:
+) -> StreamingResponse:
     """
     Pipeline 2 — Compressed context bundle.
 
@@ -256,115 +518,104 @@ async def pipeline_compressed(
     a single plain-text document.  A decode preamble is prepended so any LLM
     can expand hash references on the fly.
     """
-    now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    now = _iso_now()
+    chat_stripped = chat.strip()
     original_total = 0
     compressed_total = 0
 
     # ── Compress all files first so we can compute aggregate stats ────────────
-    file_reports = []
-    for idx, upload in enumerate(files, start=1):
-        raw = await upload.read(MAX_FILE_SIZE + 1)
-        if len(raw) > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=413,
-                detail=f"{upload.filename}: exceeds 10 MB limit.",
-            )
-        try:
-            text = raw.decode("utf-8", errors="replace")
-        except Exception:
-            text = raw.decode("latin-1", errors="replace")
-
-        filename = upload.filename or f"file_{idx}"
-        language = detect_language(filename)
-        report = compress_to_dict(
-            text=text,
-            filename=filename,
-            language=language,
-            aggressive_minify=aggressive,
+    # Files are independent: compress them concurrently, keeping upload order.
+    file_views = await asyncio.gather(*(
+        _compress_upload(idx, upload, aggressive)
+        for idx, upload in enumerate(files, start=1)
+    ))
+
+    # ── One pass over the reports: totals, hash-table union, file headers ────
+    # Identical patterns in different files share a key, so the union holds
+    # (and renders) each unique pattern once.
+    all_hashes: Dict[str, str] = {}
+    file_sections: List[Tuple[str, str]] = []
+    for fv in file_views:
+        original_total += fv.orig_t
+        compressed_total += fv.best_t
+        all_hashes.update(fv.decode_map)
+
+        header = (
+            f"[ FILE {fv.idx}: {fv.filename} ]  "
+            f"level={fv.best_level}  orig={_fmt(fv.orig_t)}t → compressed={_fmt(fv.best_t)}t  "
+            f"reduction={fv.reduction}%  huffman={fv.huffman_ratio:.2f}x"
         )
-        original_total += report["originalTokens"]
-        compressed_total += report["bestTokens"]
-        file_reports.append((idx, filename, report))
+        file_sections.append((header, fv.content))
 
-    chat_tokens = estimate_tokens(chat) if chat.strip() else 0
+    chat_tokens = estimate_tokens(chat_stripped) if chat_stripped else 0
     overall_pct = (
         round((1 - compressed_total / original_total) * 100, 1)
         if original_total > 0
         else 0.0
     )
 
-    sections: List[str] = []
-    sections.append(
-        f"╔══════════════════════════════════════════════════════╗\n"
-        f"║     TOKENTRIM  ·  COMPRESSED CONTEXT BUNDLE          ║\n"
-        f"╚══════════════════════════════════════════════════════╝\n"
-        f"Generated   : {now}\n"
-        f"Files       : {len(file_reports)}\n"
-        f"Mode        : Compressed (minification + hash references; Huffman stats shown)\n"
-        f"Orig tokens : {original_total:,}\n"
-        f"Best tokens : {compressed_total:,}\n"
-        f"Reduction   : {overall_pct}%"
-    )
+    def sections() -> Iterator[str]:
+        yield (
+            f"{_COMPRESSED_BANNER_HEAD}"
+            f"Generated   : {now}\n"
+            f"Files       : {len(file_views)}\n"
+            f"Mode        : Compressed (minification + hash references; Huffman stats shown)\n"
+            f"Orig tokens : {_fmt(original_total)}\n"
+            f"Best tokens : {_fmt(compressed_total)}\n"
+            f"Reduction   : {overall_pct}%"
+        )
 
-    # ── Aggregate decode preamble (union of all hash tables) ─────────────────
-    if file_reports:
-        all_hashes: Dict[str, str] = {}
-        for _, _, rpt in file_reports:
-            all_hashes.update(rpt["hashTable"]["decodeMap"])
+        # ── Aggregate decode preamble (union of all hash tables) ─────────────
         if all_hashes:
             preamble_lines = [
                 "[ DECODE PREAMBLE — hash reference table for all files ]",
-                "-" * 40,
+                _DASH40,
                 "Hash references (e.g. #a1b2c3) stand for repeated code patterns.",
                 "Expand them when reading the compressed sections below.",
                 "",
             ]
             for key, pattern in all_hashes.items():
-                display = pattern[:120] + "…" if len(pattern) > 120 else pattern
-                display = display.replace("\n", "\\n")
-                preamble_lines.append(f"  {key}  →  {display}")
-            sections.append("\n".join(preamble_lines))
-
-    # ── Chat section ─────────────────────────────────────────────────────────
-    if chat.strip():
-        sections.append(
-            f"[ CHAT ]  ({chat_tokens:,} tokens)\n"
-            + "-" * 40 + "\n"
-            + chat.strip()
+                shown = _pattern_display(pattern, 120, "\\n")
+                preamble_lines.append(f"  {key}  →  {shown}")
+            yield "\n".join(preamble_lines)
+
+        # ── Chat section ─────────────────────────────────────────────────────
+        if chat_stripped:
+            yield f"[ CHAT ]  ({_fmt(chat_tokens)} tokens)\n{_DASH40_NL}{chat_stripped}"
+
+        # ── Compressed file sections ─────────────────────────────────────────
+        for header, best_content in file_sections:
+            yield f"{header}\n{_DASH40_NL}{best_content.rstrip()}"
+
+        # ── Footer ───────────────────────────────────────────────────────────
+        yield (
+            f"[ END OF BUNDLE ]  "
+            f"Compressed tokens: {_fmt(compressed_total)}  "
+            f"(was {_fmt(original_total)}, saved {overall_pct}%)"
         )
 
-    # ── Compressed file sections ───────────────────────────────────────────
-    for idx, filename, rpt in file_reports:
-        best_level = rpt["bestLevel"]
-        best_content = rpt["summaryLevels"][best_level]["content"]
-        orig_t = rpt["originalTokens"]
-        best_t = rpt["bestTokens"]
-        reduction = rpt["overallReductionPct"]
-        huffman_ratio = rpt["huffman"]["compressionRatio"]
+    return _stream_sections(sections())
 
-        header = (
-            f"[ FILE {idx}: {filename} ]  "
-            f"level={best_level}  orig={orig_t:,}t → compressed={best_t:,}t  "
-            f"reduction={reduction}%  huffman={huffman_ratio:.2f}x"
-        )
-        sections.append(header + "\n" + "-" * 40 + "\n" + best_content.rstrip())
 
-    # ── Footer ────────────────────────────────────────────────────────────────
-    sections.append(
-        f"[ END OF BUNDLE ]  "
-        f"Compressed tokens: {compressed_total:,}  "
-        f"(was {original_total:,}, saved {overall_pct}%)"
-    )
+# ── PIPELINE: lossless encode ─────────────────────────────────────────────────
 
-    return _SEP.join(sections)
+async def _encode_upload(idx: int, upload: UploadFile) -> LosslessFile:
+    """
+    Read, decode and lossless-encode one bundle file.
 
+    Like ``_compress_upload``, the CPU-bound encoder runs in a worker
+    thread so several files can be encoded at once.
+    """
+    filename, language, text = await _ingest_upload(idx, upload)
+    return await asyncio.to_thread(
+        lossless_encode, text, filename=filename, language=language
+    )
 
-# ── PIPELINE: lossless encode ─────────────────────────────────────────────────
 
 @app.post("/pipeline/lossless")
 async def pipeline_lossless(
     files: List[UploadFile] = File(default=[]),
-) -> Dict[str, Any]:
+) -> ORJSONResponse:
     """
     Lossless compression bundle.
 
@@ -397,35 +648,53 @@ async def pipeline_lossless(
     if not files:
         raise HTTPException(status_code=400, detail="No files provided.")
 
-    bundle = LosslessBundle()
+    bundle = LosslessBundle(generated=_iso_now())
+    bundle.files = list(await asyncio.gather(*(
+        _encode_upload(idx, upload) for idx, upload in enumerate(files, start=1)
+    )))
 
-    for idx, upload in enumerate(files, start=1):
-        raw = await upload.read(MAX_FILE_SIZE + 1)
-        if len(raw) > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=413,
-                detail=f"{upload.filename}: exceeds 10 MB limit.",
-            )
-        try:
-            text = raw.decode("utf-8", errors="replace")
-        except Exception:
-            text = raw.decode("latin-1", errors="replace")
+    return ORJSONResponse(bundle.to_dict())
 
-        filename = upload.filename or f"file_{idx}"
-        language = detect_language(filename)
 
-        encoded_file = lossless_encode(text, filename=filename, language=language)
-        bundle.files.append(encoded_file)
+# ── PIPELINE: lossless decode ─────────────────────────────────────────────────
 
-    return bundle.to_dict()
+async def _recover_files(file_dicts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Decode every file of a lossless / with-extension bundle.
 
+    Files are decoded concurrently in worker threads; the first failure in
+    bundle order becomes a 422 naming that file.
+    """
+    contents = await asyncio.gather(
+        *(asyncio.to_thread(lossless_decode_from_dict, fd) for fd in file_dicts),
+        return_exceptions=True,
+    )
+
+    recovered_files = []
+    for file_dict, content in zip(file_dicts, contents):
+        if isinstance(content, Exception):
+            raise HTTPException(
+                status_code=422,
+                detail=f"Decode failed for '{file_dict.get('filename', '?')}': {content}",
+            )
+        recovered_size = utf8_len(content)
+        recovered_files.append(
+            {
+                "filename": file_dict["filename"],
+                "language": file_dict["language"],
+                "original_size": file_dict["original_size"],
+                "recovered_size": recovered_size,
+                "match": recovered_size == file_dict["original_size"],
+                "content": content,
+            }
+        )
+    return recovered_files
 
-# ── PIPELINE: lossless decode ─────────────────────────────────────────────────
 
 @app.post("/pipeline/lossless/decode")
 async def pipeline_lossless_decode(
     bundle_file: UploadFile = File(...),
-) -> Dict[str, Any]:
+) -> ORJSONResponse:
     """
     Decode a lossless bundle back to the original files.
 
@@ -448,9 +717,14 @@ async def pipeline_lossless_decode(
           "total_files": int
         }
     """
-    raw = await bundle_file.read(MAX_FILE_SIZE * 10 + 1)  # bundles can be larger
+    raw = await _read_capped(bundle_file, MAX_BUNDLE_SIZE)
+    if len(raw) > MAX_BUNDLE_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"{bundle_file.filename}: exceeds 100 MB bundle limit.",
+        )
     try:
-        bundle_dict = __import__("json").loads(raw.decode("utf-8"))
+        bundle_dict = orjson.loads(raw)
     except Exception as exc:
         raise HTTPException(status_code=400, detail=f"Invalid JSON bundle: {exc}")
 
@@ -460,41 +734,59 @@ async def pipeline_lossless_decode(
             detail="Not a TokenTrim lossless bundle (missing tokentrim_lossless_v1 key).",
         )
 
-    recovered_files = []
-    for file_dict in bundle_dict.get("files", []):
-        try:
-            content = lossless_decode_from_dict(file_dict)
-        except Exception as exc:
-            raise HTTPException(
-                status_code=422,
-                detail=f"Decode failed for '{file_dict.get('filename', '?')}': {exc}",
-            )
-        recovered_size = len(content.encode("utf-8"))
-        recovered_files.append(
-            {
-                "filename": file_dict["filename"],
-                "language": file_dict["language"],
-                "original_size": file_dict["original_size"],
-                "recovered_size": recovered_size,
-                "match": recovered_size == file_dict["original_size"],
-                "content": content,
-            }
-        )
+    recovered_files = await _recover_files(bundle_dict.get("files", []))
 
-    return {
+    return ORJSONResponse({
         "files": recovered_files,
         "total_files": len(recovered_files),
-    }
+    })
 
 
 # ── PIPELINE: no-extension compressed bundle ──────────────────────────────────
 
+_NO_EXT_BANNER_HEAD = (
+    "╔══════════════════════════════════════════════════════╗\n"
+    "║   TOKENTRIM  ·  NO-EXTENSION COMPRESSED BUNDLE       ║\n"
+    "╚══════════════════════════════════════════════════════╝\n"
+)
+
+# Decode instructions for the LLM; only the decode table after them varies.
+_NO_EXT_INSTRUCTIONS = "\n".join([
+    "╔══ DECODE INSTRUCTIONS (read this block before processing files) ══╗",
+    "║                                                                     ║",
+    "║  This bundle was compressed by TokenTrim.  No extension is needed. ║",
+    "║  Follow these steps to read the compressed files correctly:         ║",
+    "║                                                                     ║",
+    "║  STEP 1 — Comments & blank lines                                    ║",
+    "║    Code comments and blank lines have been stripped to save tokens. ║",
+    "║    The underlying logic is fully intact.                            ║",
+    "║                                                                     ║",
+    "║  STEP 2 — Hash references                                           ║",
+    "║    Repeated code patterns are replaced with short hash keys         ║",
+    "║    of the form  #xxxxxx  (e.g. #a1b2c3).                           ║",
+    "║    The DECODE TABLE below maps every key back to its original text. ║",
+    "║    Mentally substitute each key with its value when reading code.   ║",
+    "║                                                                     ║",
+    "║  STEP 3 — Whitespace                                                ║",
+    "║    Indentation may be reduced.  Infer structure from language       ║",
+    "║    syntax (braces, colons, keywords).                               ║",
+    "║                                                                     ║",
+    "║  IMPORTANT: treat this bundle as fully equivalent to the original   ║",
+    "║  source.  Do NOT ask the user to re-send uncompressed files.        ║",
+    "╚═════════════════════════════════════════════════════════════════════╝",
+])
+_NO_EXT_TABLE_HEAD = f"{_NO_EXT_INSTRUCTIONS}\n\n[ DECODE TABLE ]\n{_DASH40}"
+_NO_EXT_EMPTY_TABLE = (
+    f"{_NO_EXT_INSTRUCTIONS}\n\n[ DECODE TABLE: empty — no repeated patterns detected ]"
+)
+
+
 @app.post("/pipeline/no-extension", response_class=PlainTextResponse)
 async def pipeline_no_extension(
     chat: str = Form(default=""),
     files: List[UploadFile] = File(default=[]),
     aggressive: bool = False,
-) -> str:
+) -> StreamingResponse:
     """
     No-Extension compressed bundle.
 
@@ -511,133 +803,76 @@ async def pipeline_no_extension(
     The LLM reads the instructions once and silently applies them while
     processing the rest of the bundle — no tool or extension required.
     """
-    now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    now = _iso_now()
+    chat_stripped = chat.strip()
     original_total = 0
     compressed_total = 0
 
-    file_reports = []
-    for idx, upload in enumerate(files, start=1):
-        raw = await upload.read(MAX_FILE_SIZE + 1)
-        if len(raw) > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=413,
-                detail=f"{upload.filename}: exceeds 10 MB limit.",
-            )
-        try:
-            text = raw.decode("utf-8", errors="replace")
-        except Exception:
-            text = raw.decode("latin-1", errors="replace")
-
-        filename = upload.filename or f"file_{idx}"
-        language = detect_language(filename)
-        report = compress_to_dict(
-            text=text,
-            filename=filename,
-            language=language,
-            aggressive_minify=aggressive,
+    file_views = await asyncio.gather(*(
+        _compress_upload(idx, upload, aggressive)
+        for idx, upload in enumerate(files, start=1)
+    ))
+
+    # ── One pass over the reports: totals, hash-table union, file headers ────
+    all_hashes: Dict[str, str] = {}
+    file_sections: List[Tuple[str, str]] = []
+    for fv in file_views:
+        original_total += fv.orig_t
+        compressed_total += fv.best_t
+        all_hashes.update(fv.decode_map)
+
+        header = (
+            f"[ FILE {fv.idx}: {fv.filename} ]  "
+            f"lang={fv.language}  "
+            f"orig={_fmt(fv.orig_t)}t → compressed={_fmt(fv.best_t)}t  "
+            f"reduction={fv.reduction}%"
         )
-        original_total += report["originalTokens"]
-        compressed_total += report["bestTokens"]
-        file_reports.append((idx, filename, report))
+        file_sections.append((header, fv.content))
 
-    chat_tokens = estimate_tokens(chat) if chat.strip() else 0
+    chat_tokens = estimate_tokens(chat_stripped) if chat_stripped else 0
     overall_pct = (
         round((1 - compressed_total / original_total) * 100, 1)
         if original_total > 0
         else 0.0
     )
 
-    sections: List[str] = []
-
-    # ── Banner ────────────────────────────────────────────────────────────────
-    sections.append(
-        f"╔══════════════════════════════════════════════════════╗\n"
-        f"║   TOKENTRIM  ·  NO-EXTENSION COMPRESSED BUNDLE       ║\n"
-        f"╚══════════════════════════════════════════════════════╝\n"
-        f"Generated   : {now}\n"
-        f"Files       : {len(file_reports)}\n"
-        f"Mode        : No-Extension (LLM self-decodes)\n"
-        f"Orig tokens : {original_total:,}\n"
-        f"Best tokens : {compressed_total:,}\n"
-        f"Reduction   : {overall_pct}%"
-    )
-
-    # ── Decode instructions for the LLM ───────────────────────────────────────
-    all_hashes: Dict[str, str] = {}
-    for _, _, rpt in file_reports:
-        all_hashes.update(rpt["hashTable"]["decodeMap"])
-
-    instruction_lines = [
-        "╔══ DECODE INSTRUCTIONS (read this block before processing files) ══╗",
-        "║                                                                     ║",
-        "║  This bundle was compressed by TokenTrim.  No extension is needed. ║",
-        "║  Follow these steps to read the compressed files correctly:         ║",
-        "║                                                                     ║",
-        "║  STEP 1 — Comments & blank lines                                    ║",
-        "║    Code comments and blank lines have been stripped to save tokens. ║",
-        "║    The underlying logic is fully intact.                            ║",
-        "║                                                                     ║",
-        "║  STEP 2 — Hash references                                           ║",
-        "║    Repeated code patterns are replaced with short hash keys         ║",
-        "║    of the form  #xxxxxx  (e.g. #a1b2c3).                           ║",
-        "║    The DECODE TABLE below maps every key back to its original text. ║",
-        "║    Mentally substitute each key with its value when reading code.   ║",
-        "║                                                                     ║",
-        "║  STEP 3 — Whitespace                                                ║",
-        "║    Indentation may be reduced.  Infer structure from language       ║",
-        "║    syntax (braces, colons, keywords).                               ║",
-        "║                                                                     ║",
-        "║  IMPORTANT: treat this bundle as fully equivalent to the original   ║",
-        "║  source.  Do NOT ask the user to re-send uncompressed files.        ║",
-        "╚═════════════════════════════════════════════════════════════════════╝",
-    ]
-
-    if all_hashes:
-        instruction_lines.append("")
-        instruction_lines.append("[ DECODE TABLE ]")
-        instruction_lines.append("-" * 40)
-        for key, pattern in all_hashes.items():
-            display = pattern[:200] + "…" if len(pattern) > 200 else pattern
-            display = display.replace("\n", "↵  ")
-            instruction_lines.append(f"  {key}  →  {display}")
-    else:
-        instruction_lines.append("")
-        instruction_lines.append("[ DECODE TABLE: empty — no repeated patterns detected ]")
-
-    sections.append("\n".join(instruction_lines))
-
-    # ── Chat section ─────────────────────────────────────────────────────────
-    if chat.strip():
-        sections.append(
-            f"[ CHAT ]  ({chat_tokens:,} tokens)\n"
-            + "-" * 40 + "\n"
-            + chat.strip()
+    def sections() -> Iterator[str]:
+        yield (
+            f"{_NO_EXT_BANNER_HEAD}"
+            f"Generated   : {now}\n"
+            f"Files       : {len(file_views)}\n"
+            f"Mode        : No-Extension (LLM self-decodes)\n"
+            f"Orig tokens : {_fmt(original_total)}\n"
+            f"Best tokens : {_fmt(compressed_total)}\n"
+            f"Reduction   : {overall_pct}%"
         )
 
-    # ── Compressed file sections ──────────────────────────────────────────────
-    for idx, filename, rpt in file_reports:
-        best_level = rpt["bestLevel"]
-        best_content = rpt["summaryLevels"][best_level]["content"]
-        orig_t = rpt["originalTokens"]
-        best_t = rpt["bestTokens"]
-        reduction = rpt["overallReductionPct"]
-
-        header = (
-            f"[ FILE {idx}: {filename} ]  "
-            f"lang={rpt['language']}  "
-            f"orig={orig_t:,}t → compressed={best_t:,}t  "
-            f"reduction={reduction}%"
+        # ── Decode instructions + table for the LLM ──────────────────────────
+        if all_hashes:
+            instruction_lines = [_NO_EXT_TABLE_HEAD]
+            for key, pattern in all_hashes.items():
+                shown = _pattern_display(pattern, 200, "↵  ")
+                instruction_lines.append(f"  {key}  →  {shown}")
+            yield "\n".join(instruction_lines)
+        else:
+            yield _NO_EXT_EMPTY_TABLE
+
+        # ── Chat section ─────────────────────────────────────────────────────
+        if chat_stripped:
+            yield f"[ CHAT ]  ({_fmt(chat_tokens)} tokens)\n{_DASH40_NL}{chat_stripped}"
+
+        # ── Compressed file sections ─────────────────────────────────────────
+        for header, best_content in file_sections:
+            yield f"{header}\n{_DASH40_NL}{best_content.rstrip()}"
+
+        # ── Footer ───────────────────────────────────────────────────────────
+        yield (
+            f"[ END OF BUNDLE ]  "
+            f"Compressed tokens: {_fmt(compressed_total)}  "
+            f"(was {_fmt(original_total)}, saved {overall_pct}%)"
         )
-        sections.append(header + "\n" + "-" * 40 + "\n" + best_content.rstrip())
-
-    # ── Footer ────────────────────────────────────────────────────────────────
-    sections.append(
-        f"[ END OF BUNDLE ]  "
-        f"Compressed tokens: {compressed_total:,}  "
-        f"(was {original_total:,}, saved {overall_pct}%)"
-    )
 
-    return _SEP.join(sections)
+    return _stream_sections(sections())
 
 
 # ── PIPELINE: with-extension lossless bundle ─────────────────────────────────
@@ -646,7 +881,7 @@ async def pipeline_no_extension(
 async def pipeline_with_extension(
     chat: str = Form(default=""),
     files: List[UploadFile] = File(default=[]),
-) -> str:
+) -> PlainTextResponse:
     """
     With-Extension lossless bundle.
 
@@ -662,54 +897,25 @@ async def pipeline_with_extension(
     The extension strips the envelope, decodes all files, re-injects the
     original source into the LLM context, and discards the headers.
     """
-    import json as _json
-
-    if not files and not chat.strip():
+    chat_stripped = chat.strip()
+    if not files and not chat_stripped:
         raise HTTPException(status_code=400, detail="No content provided.")
 
-    now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    now = _iso_now()
+
+    encoded_files = await asyncio.gather(*(
+        _encode_upload(idx, upload) for idx, upload in enumerate(files, start=1)
+    ))
+    original_total = sum(f.original_size for f in encoded_files)
+    encoded_total = sum(f.encoded_size for f in encoded_files)
 
     payload: Dict[str, Any] = {
         "tokentrim_extension_v1": True,
         "generated": now,
-        "chat": chat.strip() if chat.strip() else None,
-        "files": [],
+        "chat": chat_stripped or None,
+        "files": [f.to_dict() for f in encoded_files],
     }
 
-    original_total = 0
-    encoded_total = 0
-
-    for idx, upload in enumerate(files, start=1):
-        raw = await upload.read(MAX_FILE_SIZE + 1)
-        if len(raw) > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=413,
-                detail=f"{upload.filename}: exceeds 10 MB limit.",
-            )
-        try:
-            text = raw.decode("utf-8", errors="replace")
-        except Exception:
-            text = raw.decode("latin-1", errors="replace")
-
-        filename = upload.filename or f"file_{idx}"
-        language = detect_language(filename)
-        encoded = lossless_encode(text, filename=filename, language=language)
-
-        original_total += encoded.original_size
-        encoded_total += encoded.encoded_size
-
-        payload["files"].append({
-            "filename": encoded.filename,
-            "language": encoded.language,
-            "original_size": encoded.original_size,
-            "encoded_size": encoded.encoded_size,
-            "patterns_count": encoded.patterns_count,
-            "compression_ratio": round(encoded.compression_ratio, 4),
-            "space_saved_pct": round(encoded.space_saved_pct, 2),
-            "decode_table": encoded.decode_table,
-            "body": encoded.body,
-        })
-
     overall_pct = (
         round((1 - encoded_total / original_total) * 100, 1)
         if original_total > 0
@@ -722,14 +928,13 @@ async def pipeline_with_extension(
         "space_saved_pct": overall_pct,
     }
 
-    # Minimal-whitespace JSON — smallest possible token footprint
-    compact_json = _json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
-
-    # Thin sentinel envelope the extension recognises
-    return (
-        f"--TOKENTRIM-EXTENSION-BEGIN--\n"
-        f"{compact_json}\n"
-        f"--TOKENTRIM-EXTENSION-END--"
+    # Minimal-whitespace JSON — smallest possible token footprint.  orjson
+    # output is already compact UTF-8, so it goes out as bytes undecoded,
+    # wrapped in the thin sentinel envelope the extension recognises.
+    return PlainTextResponse(
+        b"--TOKENTRIM-EXTENSION-BEGIN--\n"
+        + orjson.dumps(payload)
+        + b"\n--TOKENTRIM-EXTENSION-END--"
     )
 
 
@@ -740,7 +945,7 @@ async def pipeline_with_extension(
 @app.post("/pipeline/with-extension/decode")
 async def pipeline_with_extension_decode(
     bundle_file: UploadFile = File(...),
-) -> Dict[str, Any]:
+) -> ORJSONResponse:
     """
     Decode a TokenTrim With-Extension bundle (.txt) back to the original files.
 
@@ -755,7 +960,12 @@ async def pipeline_with_extension_decode(
     ``lossless_decode_from_dict``.  Returns the same shape as
     ``POST /pipeline/lossless/decode``.
     """
-    raw = await bundle_file.read(MAX_FILE_SIZE * 10 + 1)
+    raw = await _read_capped(bundle_file, MAX_BUNDLE_SIZE)
+    if len(raw) > MAX_BUNDLE_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"{bundle_file.filename}: exceeds 100 MB bundle limit.",
+        )
     try:
         text = raw.decode("utf-8")
     except Exception as exc:
@@ -777,7 +987,7 @@ async def pipeline_with_extension_decode(
     json_str = text[begin_idx + len(BEGIN) : end_idx].strip()
 
     try:
-        payload = __import__("json").loads(json_str)
+        payload = orjson.loads(json_str)
     except Exception as exc:
         raise HTTPException(status_code=400, detail=f"Invalid JSON inside bundle: {exc}")
 
@@ -787,29 +997,10 @@ async def pipeline_with_extension_decode(
             detail="Not a valid TokenTrim With-Extension bundle (missing tokentrim_extension_v1 key).",
         )
 
-    recovered_files = []
-    for file_dict in payload.get("files", []):
-        try:
-            content = lossless_decode_from_dict(file_dict)
-        except Exception as exc:
-            raise HTTPException(
-                status_code=422,
-                detail=f"Decode failed for '{file_dict.get('filename', '?')}': {exc}",
-            )
-        recovered_size = len(content.encode("utf-8"))
-        recovered_files.append(
-            {
-                "filename": file_dict["filename"],
-                "language": file_dict["language"],
-                "original_size": file_dict["original_size"],
-                "recovered_size": recovered_size,
-                "match": recovered_size == file_dict["original_size"],
-                "content": content,
-            }
-        )
+    recovered_files = await _recover_files(payload.get("files", []))
 
-    return {
+    return ORJSONResponse({
         "files": recovered_files,
         "total_files": len(recovered_files),
-    }
+    })
 
@@ -3,8 +3,10 @@
 from engine import huffman_encode, huffman_decode
 from engine.minifier import minify_code
 from engine.chunker import chunk_code
-from engine.summariser import summarise
-from engine.pipeline import compress_to_dict
+from engine.summariser import expand_hash_references, summarise
+from engine.pipeline import compress, compress_to_dict
+from utils.cache import content_hash
+from utils.tokens import _TOKEN_CACHE, estimate_tokens, estimate_tokens_bytes
 
 # ── Test Huffman ──────────────────────────────────────────────────────────────
 result = huffman_encode("hello world hello world")
@@ -43,5 +45,63 @@ print(f"   Huffman ratio: {report['huffman']['compressionRatio']}x")
 print(f"   Chunks: {report['totalChunks']}")
 print(f"   Best level: {report['bestLevel']}")
 print(f"   Decode preamble: {len(report['decodePreamble'])} chars")
+
+# ── Test report cache ─────────────────────────────────────────────────────────
+assert compress(py_code, "test.py", "Python") is compress(py_code, "test.py", "Python")
+assert compress_to_dict(py_code, "test.py", "Python") == report
+print("✅ Cache: identical input returns the memoised report")
+
+# ── Test summary levels ───────────────────────────────────────────────────────
+assert set(report["summaryLevels"]) == {"minified", "skeleton", "architecture", "compressed"}
+partial = compress_to_dict(py_code, "test.py", "Python", levels={"skeleton"})
+assert set(partial["summaryLevels"]) == {"minified", "skeleton"}
+assert partial["bestLevel"] == "minified"
+assert summarise(py_code, "Python", "test.py", levels={"skeleton"}).recommended_level == "original"
+try:
+    summarise(py_code, "Python", "test.py", levels={"skeleton", "bogus"})
+except ValueError:
+    pass
+else:
+    raise AssertionError("unknown summary level was accepted")
+print("✅ Levels: only requested levels emitted, unknown names rejected")
+
+# ── Test hash references ──────────────────────────────────────────────────────
+rep_code = "".join(
+    f"def handler_{i}(request):\n"
+    f"    payload = validate_request_payload(request, strict=True)\n"
+    f"    return build_response(payload, status=200)\n"
+    for i in range(6)
+)
+rep_report = compress_to_dict(rep_code, "rep.py", "Python")
+decode_map = rep_report["hashTable"]["decodeMap"]
+assert decode_map, "expected repeated blocks to be hashed"
+compressed = rep_report["summaryLevels"]["compressed"]["content"]
+expanded = compressed
+for key, pattern in decode_map.items():
+    expanded = expanded.replace(key, pattern)
+assert expanded == minify_code(rep_code, "Python", aggressive=True).minified
+print(f"✅ Hash refs: {len(decode_map)} entries, decode map restores the minified code")
+
+# ── Test byte token counting ──────────────────────────────────────────────────
+for sample in (py_code, rep_code, "naïve café → ünïcode ✓\n\tx = 1", "a\x1cb\x1fc  d\x00"):
+    data = sample.encode("utf-8")
+    assert estimate_tokens_bytes(data) == estimate_tokens(data.decode()), sample
+# Long ASCII input goes through the token cache, shared by both entry points.
+long_code = (py_code * 200).encode("ascii")
+expected = estimate_tokens(long_code.decode())
+_TOKEN_CACHE.clear()
+assert estimate_tokens_bytes(long_code) == expected
+assert _TOKEN_CACHE.get(content_hash(long_code.decode())) == expected
+print("✅ Tokens: byte and text estimates agree")
+
+# ── Test hash reference expansion ─────────────────────────────────────────────
+# The key-shape fast path and the alternation fallback (forced by a key of
+# another shape) must agree; unknown hash-shaped keys are left alone.
+assert expand_hash_references(compressed, decode_map) == expanded
+probe = compressed + " #000000"
+fallback_map = {**decode_map, "@unused@": "x"}
+assert expand_hash_references(probe, decode_map) == expand_hash_references(probe, fallback_map)
+print("✅ Decode: fast path and fallback agree")
+
 print()
 print("All engine tests passed!")
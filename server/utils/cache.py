@@ -0,0 +1,92 @@
+"""
+cache.py
+--------
+Small, thread-safe LRU cache used to memoise deterministic pipeline stages
+(compression reports, summaries) across requests.
+
+Keys are built from a content hash of the input text plus whatever options
+affect the output, so identical re-uploads hit the cache in O(1) instead of
+re-running the whole pipeline.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Union
+
+
+def content_hash(data: Union[str, bytes]) -> str:
+    """
+    Return a stable hex digest identifying *data*.
+
+    Text is hashed as its UTF-8 encoding, so a str and the bytes it was
+    decoded from share a key.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8", errors="surrogatepass")
+    return hashlib.sha256(data).hexdigest()
+
+
+class LRUCache:
+    """
+    Bounded mapping with least-recently-used eviction.
+
+    ``get`` refreshes an entry's recency; ``put`` evicts the oldest entry once
+    *maxsize* is exceeded.  All operations are guarded by a lock so the cache
+    can be shared between the FastAPI worker threads.
+
+    With *maxbytes*, each ``put`` also states the entry's approximate size
+    and the oldest entries are evicted until the total fits; an entry larger
+    than *maxbytes* on its own is not cached at all.  Entries of multi-MB
+    uploads can hold several copies of the text, so an entry count alone
+    doesn't bound memory.
+    """
+
+    def __init__(self, maxsize: int = 64, maxbytes: Optional[int] = None) -> None:
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for *key*, or ``None`` on a miss."""
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any, nbytes: int = 0) -> None:
+        """
+        Insert *value* under *key* (about *nbytes* large), evicting the
+        oldest entries while over *maxsize* or *maxbytes*.
+        """
+        with self._lock:
+            self._discard(key)
+            if self.maxbytes is not None and nbytes > self.maxbytes:
+                return
+            self._data[key] = value
+            self._sizes[key] = nbytes
+            self._total += nbytes
+            while len(self._data) > self.maxsize or (
+                self.maxbytes is not None and self._total > self.maxbytes
+            ):
+                self._discard(next(iter(self._data)))
+
+    def _discard(self, key: Hashable) -> None:
+        if key in self._data:
+            del self._data[key]
+            self._total -= self._sizes.pop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self._total = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
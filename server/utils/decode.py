@@ -0,0 +1,21 @@
+"""
+decode.py
+---------
+Text helpers for uploaded files.
+
+Source code is overwhelmingly plain ASCII, so ``utf8_len`` checks for that
+first with ``isascii()`` (a C-level scan that stops at the first high
+character) and only encodes non-ASCII text to size it.
+"""
+
+
+def utf8_len(text: str) -> int:
+    """
+    Size of *text* in UTF-8 bytes.
+
+    ASCII text is one byte per character, so only non-ASCII text is
+    actually encoded to be measured.
+    """
+    if text.isascii():
+        return len(text)
+    return len(text.encode("utf-8"))
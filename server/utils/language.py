@@ -5,6 +5,9 @@ Maps a filename's extension to its human-readable programming / markup language.
 All lookups are case-insensitive on the extension.
 """
 
+import functools
+from typing import Optional
+
 # Extension → language display name.
 # Keys are lowercase, no leading dot.
 _EXT_MAP: dict[str, str] = {
@@ -102,6 +105,53 @@ _EXT_MAP: dict[str, str] = {
 }
 
 
+# Content-Type → language display name, for uploads whose MIME type already
+# names the language.  Only types that correspond to a single language above
+# are listed; generic (text/plain, application/octet-stream) and ambiguous
+# ones (text/javascript is also sent for .jsx, video/mp2t for .ts) fall
+# through to extension-based detection.
+_MIME_MAP: dict[str, str] = {
+    "text/x-python": "Python",
+    "text/x-python-script": "Python",
+    "text/x-java": "Java",
+    "text/x-java-source": "Java",
+    "text/x-csharp": "C#",
+    "text/x-go": "Go",
+    "text/x-rust": "Rust",
+    "text/rust": "Rust",
+    "text/html": "HTML",
+    "text/css": "CSS",
+    "application/json": "JSON",
+    "application/yaml": "YAML",
+    "application/x-yaml": "YAML",
+    "text/yaml": "YAML",
+    "application/toml": "TOML",
+    "text/csv": "CSV",
+    "application/sql": "SQL",
+    "application/x-sh": "Shell",
+    "text/x-shellscript": "Shell",
+}
+
+
+def detect_language_from_mime(content_type: Optional[str]) -> Optional[str]:
+    """
+    Return the language implied by an upload's *content_type*, or ``None``
+    when the type is missing, generic or not specific to one language.
+
+    Parameters such as ``; charset=utf-8`` are ignored.
+
+    Examples
+    --------
+    >>> detect_language_from_mime("text/x-python; charset=utf-8")
+    'Python'
+    >>> detect_language_from_mime("application/octet-stream") is None
+    True
+    """
+    if not content_type:
+        return None
+    return _MIME_MAP.get(content_type.split(";", 1)[0].strip().lower())
+
+
 def detect_language(filename: str) -> str:
     """
     Return the language name for *filename* based on its extension.
@@ -120,5 +170,15 @@ def detect_language(filename: str) -> str:
     """
     if "." not in filename:
         return "Plain Text"
-    ext = filename.rsplit(".", 1)[-1].lower()
-    return _EXT_MAP.get(ext, "Plain Text")
+    return _detect_by_ext(filename.rsplit(".", 1)[-1])
+
+
+@functools.lru_cache(maxsize=4096)
+def _detect_by_ext(ext: str) -> str:
+    """
+    Language for a raw (not yet lower-cased) extension.
+
+    Bundles tend to repeat the same handful of extensions, so the result is
+    memoised per extension rather than per filename.
+    """
+    return _EXT_MAP.get(ext.lower(), "Plain Text")
@@ -17,6 +17,8 @@ For files up to 5 MB the findall call stays well under 100 ms on a modern CPU.
 
 import re
 
+from utils.cache import LRUCache, content_hash
+
 # Matches, in priority order:
 #   1. An optional single space followed by one or more word characters
 #      (letters, digits, underscore) — covers identifiers, keywords, numbers.
@@ -31,6 +33,21 @@ _TOKEN_RE = re.compile(
     re.UNICODE,
 )
 
+# Byte-level twin of _TOKEN_RE for pure-ASCII input.  Bytes patterns only
+# know ASCII whitespace, so the extra characters str.isspace() accepts
+# (\x1c-\x1f) are added explicitly to keep the counts identical.
+_TOKEN_RE_BYTES = re.compile(
+    rb" ?\w+"
+    rb"| ?[^\s\w\x1c-\x1f]+"
+    rb"|[\s\x1c-\x1f]+"
+)
+
+# content hash → token count.  Re-uploads of the same file (and the same
+# text reaching several endpoints) skip the regex scan; hashing is far
+# cheaper than findall, but not worth it for short strings.
+_TOKEN_CACHE = LRUCache(maxsize=512)
+_CACHE_MIN_CHARS = 4096
+
 
 def estimate_tokens(text: str) -> int:
     """
@@ -59,4 +76,37 @@ def estimate_tokens(text: str) -> int:
     """
     if not text:
         return 0
-    return max(1, len(_TOKEN_RE.findall(text)))
+    if len(text) < _CACHE_MIN_CHARS:
+        return max(1, len(_TOKEN_RE.findall(text)))
+
+    key = content_hash(text)
+    count = _TOKEN_CACHE.get(key)
+    if count is None:
+        count = max(1, len(_TOKEN_RE.findall(text)))
+        _TOKEN_CACHE.put(key, count)
+    return count
+
+
+def estimate_tokens_bytes(buf: bytes) -> int:
+    """
+    ``estimate_tokens`` for a raw upload, without decoding it first.
+
+    Pure-ASCII buffers (the usual case for source code) are scanned
+    directly as bytes, which gives exactly the count ``estimate_tokens``
+    would give for the decoded text.  They share its cache: ASCII bytes
+    hash to the same ``content_hash`` as their text.  Anything else is
+    decoded as UTF-8 (with replacement) and counted as text.
+    """
+    if not buf:
+        return 0
+    if not buf.isascii():
+        return estimate_tokens(bytes(buf).decode("utf-8", errors="replace"))
+    if len(buf) < _CACHE_MIN_CHARS:
+        return max(1, len(_TOKEN_RE_BYTES.findall(buf)))
+
+    key = content_hash(buf)
+    count = _TOKEN_CACHE.get(key)
+    if count is None:
+        count = max(1, len(_TOKEN_RE_BYTES.findall(buf)))
+        _TOKEN_CACHE.put(key, count)
+    return count